@@ -1,66 +1,137 @@
-import socket, struct, sys, threading, queue, time, random
+import socket, select, struct, sys, threading, queue, time, random
+from collections import namedtuple
+
+# parsed header; attribute access on a namedtuple is cheaper than a dict lookup
+# (the client never reads reply payloads, so they are not sliced out)
+Packet = namedtuple("Packet", "cmd seq sid clock ts")
 
 class Client:
     MAGIC = 0xC461
     VERSION = 1
     CMD_HELLO, CMD_DATA, CMD_ALIVE, CMD_GOODBYE = 0, 1, 2, 3
-    HDR_FMT = "!H B B I I Q d"
-    HDR_SIZE = struct.calcsize(HDR_FMT)
+    HDR_FMT = "!H B B I I I d"
+    HDR_STRUCT = struct.Struct(HDR_FMT)  # compiled once, reused per packet
+    HDR_SIZE = HDR_STRUCT.size
+    # the Lamport clock is a 32-bit field on the wire, so it counts modulo
+    # 2**32: every update is masked and wraps from 0xFFFFFFFF back to 0
+    CLOCK_MASK = 0xFFFFFFFF
+    # per-packet part of the header: everything after MAGIC + VERSION, which
+    # are written into the send buffer once
+    HDR_TAIL = struct.Struct("!B I I I d")
+    HDR_TAIL_OFFSET = HDR_SIZE - HDR_TAIL.size
+    MAX_DATA_SIZE = 4096
+    MAX_DGRAM_SIZE = 65507  # largest UDP payload over IPv4
+    RECV_BATCH = 32  # max datagrams handled per receiver wakeup
+    SOCK_BUF_SIZE = 4 * 1024 * 1024  # kernel caps this at net.core.[rw]mem_max
+
+    # fixed attribute layout: seq/clock/flags are updated on every packet
+    __slots__ = (
+        "session_id", "seq", "clock", "sock", "recv_buf", "recv_mv",
+        "send_buf", "send_mv", "send_q",
+        "SERVER_HOST", "SERVER_PORT", "server_addr",
+        "running", "awaiting_alive", "alive_evt", "TIMEOUT", "handlers",
+        "hello_sent", "clock_offset",
+    )
 
     def __init__(self, host, port):
         self.session_id = random.getrandbits(32)
         self.seq = 0
         self.clock = 0
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.settimeout(0.5)  # non-blocking receive with small timeout
+        self.sock.setblocking(False)  # receiver waits in select(), then drains
+        # large kernel buffers so bursts are not dropped while we are descheduled
+        for opt in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, opt, self.SOCK_BUF_SIZE)
+            except OSError:
+                pass
+        # single receive buffer reused for every datagram
+        self.recv_buf = bytearray(self.MAX_DATA_SIZE)
+        self.recv_mv = memoryview(self.recv_buf)
+        # single send buffer every outgoing datagram is packed into
+        self.send_buf = bytearray(self.MAX_DGRAM_SIZE)
+        self.send_mv = memoryview(self.send_buf)
+        struct.pack_into("!H B", self.send_buf, 0, self.MAGIC, self.VERSION)
         self.send_q = queue.Queue()
         self.SERVER_HOST = host
         self.SERVER_PORT = port
+        # resolve once; sendto() with a host name does a getaddrinfo() per call
+        self.server_addr = socket.getaddrinfo(
+            host, port, socket.AF_INET, socket.SOCK_DGRAM
+        )[0][4]
+        # "connect" the UDP socket: the kernel caches the route and we can use
+        # send()/recv_into() without passing or getting back an address
+        self.sock.connect(self.server_addr)
 
         self.running = True
         self.awaiting_alive = False
-        self.last_send_time = None
+        self.alive_evt = threading.Event()  # set by receiver on ALIVE / close
         self.TIMEOUT = 2.0  # seconds
 
+        # latency is measured on time.monotonic(). The server's ts is mapped
+        # onto it through clock_offset, estimated from the HELLO round trip
+        # (server stamped its reply roughly mid-way). The server stamps its
+        # own monotonic clock, which has no relation to ours, so without that
+        # estimate (HELLO reply lost) no latency is reported.
+        self.hello_sent = None
+        self.clock_offset = None
+
+        # command → handler, looked up once per received packet
+        self.handlers = {
+            self.CMD_HELLO: self.on_hello,
+            self.CMD_ALIVE: self.on_alive,
+            self.CMD_GOODBYE: self.on_goodbye,
+        }
+
     # ---------------- Clock helpers ---------------- #
     def bump_clock_event(self):
-        self.clock += 1
+        self.clock = (self.clock + 1) & self.CLOCK_MASK
         return self.clock
 
     def bump_clock_recv(self, rcvd_clock):
-        self.clock = max(self.clock, rcvd_clock) + 1
+        self.clock = (max(self.clock, rcvd_clock) + 1) & self.CLOCK_MASK
         return self.clock
 
     # ---------------- Header helpers ---------------- #
-    def pack_header(self, command, seq, session_id, clock, payload=b""):
-        ts = time.time()
-        hdr = struct.pack(
-            self.HDR_FMT, self.MAGIC, self.VERSION, command, seq, session_id, clock, ts
+    def send_packet(self, command, payload=b""):
+        # one send event: bump the clock, pack the varying header fields and
+        # the payload straight into the shared send buffer, send, advance seq
+        self.clock = (self.clock + 1) & self.CLOCK_MASK
+        self.HDR_TAIL.pack_into(
+            self.send_buf, self.HDR_TAIL_OFFSET, command,
+            self.seq, self.session_id, self.clock, time.monotonic(),
         )
-        return hdr + payload
+        end = self.HDR_SIZE + len(payload)
+        self.send_mv[self.HDR_SIZE : end] = payload
+        try:
+            self.sock.send(self.send_mv[:end])
+        except ConnectionRefusedError:
+            # error left pending by an earlier ICMP port unreachable; it is
+            # cleared by this call, so retry once
+            self.sock.send(self.send_mv[:end])
+        self.seq += 1
 
     def unpack_header(self, data):
         if len(data) < self.HDR_SIZE:
             return None
-        magic, version, cmd, seq, sid, rcv_clock, sent_ts = struct.unpack(
-            self.HDR_FMT, data[: self.HDR_SIZE]
+        magic, version, cmd, seq, sid, rcv_clock, sent_ts = (
+            self.HDR_STRUCT.unpack_from(data, 0)
         )
         if magic != self.MAGIC or version != self.VERSION:
             return None
-        payload = data[self.HDR_SIZE :]
-        return dict(
-            cmd=cmd, seq=seq, sid=sid, clock=rcv_clock, ts=sent_ts, payload=payload
-        )
+        return Packet(cmd, seq, sid, rcv_clock, sent_ts)
 
     # ---------------- Reader thread ---------------- #
     def reader(self):
-        for line in sys.stdin:
-            line = line.rstrip("\n")
+        # read raw bytes: lines go on the wire as-is, with no decode/encode
+        for line in sys.stdin.buffer:
             self.bump_clock_event()
-            if line == "q":
+            if line in (b"q\n", b"q"):
                 self.send_q.put(None)  # signal EOF if 'q' is typed
                 break
 
+            if not line.endswith(b"\n"):
+                line += b"\n"  # last line had no newline
             self.send_q.put(line)
             
         # Only put None once at EOF if not already sent
@@ -70,98 +141,114 @@ class Client:
 
     # ---------------- Receiver thread ---------------- #
     def receiver(self):
+        # bind everything the loop touches per packet to locals once
+        wait, rlist = select.select, [self.sock]
+        recv_into, buf, mv = self.sock.recv_into, self.recv_buf, self.recv_mv
+        handle, batch = self.handle_packet, range(self.RECV_BATCH)
+
         while self.running:
-            try:
-                data, _ = self.sock.recvfrom(4096)
-            except socket.timeout:
-                # just loop back; timeout check is handled in run()
+            # wait for the socket to become readable; timeout check is
+            # handled in run()
+            ready, _, _ = wait(rlist, [], [], 0.5)
+            if not ready:
                 continue
 
-            pkt = self.unpack_header(data)
-            if not pkt:
-                continue
+            # drain whatever has queued up since the last wakeup
+            for _ in batch:
+                try:
+                    n = recv_into(buf)
+                except BlockingIOError:
+                    break
+                except ConnectionRefusedError:
+                    # ICMP port unreachable for an earlier send; server not up
+                    continue
+                handle(mv[:n])
+                if not self.running:
+                    break
 
-            cmd = pkt["cmd"]
+    def handle_packet(self, data):
+        pkt = self.unpack_header(data)
+        if not pkt:
+            return
+        self.handlers.get(pkt.cmd, self.on_unexpected)(pkt)
 
-            if cmd == self.CMD_HELLO:
-                # Server acknowledged our HELLO
-                self.bump_clock_recv(pkt["clock"])
+    def on_hello(self, pkt):
+        # Server acknowledged our HELLO
+        self.bump_clock_recv(pkt.clock)
+        if self.hello_sent is not None:
+            midpoint = (self.hello_sent + time.monotonic()) / 2
+            self.clock_offset = pkt.ts - midpoint
 
-            elif cmd == self.CMD_ALIVE:
-                # Server acknowledged our DATA
-                self.bump_clock_recv(pkt["clock"])
-                self.awaiting_alive = False
+    def on_alive(self, pkt):
+        # Server acknowledged our DATA
+        self.bump_clock_recv(pkt.clock)
+        self.awaiting_alive = False
+        self.alive_evt.set()
 
-                # latency measurement
-                latency = time.time() - pkt["ts"]
-                print(f"[latency] s→c {latency*1000:.2f} ms", file=sys.stderr)
+        # latency measurement
+        if self.clock_offset is None:
+            return
+        latency = time.monotonic() + self.clock_offset - pkt.ts
+        print(f"[latency] s→c {latency*1000:.2f} ms", file=sys.stderr)
 
-            elif cmd == self.CMD_GOODBYE:
-                # Server closed session → client closes immediately
-                self.bump_clock_recv(pkt["clock"])
-                print("Server closed session.")
-                self.running = False
+    def on_goodbye(self, pkt):
+        # Server closed session → client closes immediately
+        self.bump_clock_recv(pkt.clock)
+        print("Server closed session.")
+        self.running = False
+        self.alive_evt.set()
 
-            else:
-                # Unexpected command = protocol error → close
-                print(f"Unexpected command {cmd}, closing session.")
-                self.running = False
+    def on_unexpected(self, pkt):
+        # Unexpected command = protocol error → close
+        print(f"Unexpected command {pkt.cmd}, closing session.")
+        self.running = False
+        self.alive_evt.set()
 
 
     # ---------------- Main run ---------------- #
     def run(self):
         # start reader + receiver
         threading.Thread(target=self.reader, daemon=True).start()
-        threading.Thread(target=self.receiver, daemon=True).start()
+        rx = threading.Thread(target=self.receiver, daemon=True)
+        rx.start()
 
         # Step 1: HELLO
-        self.bump_clock_event()
-        self.sock.sendto(
-            self.pack_header(self.CMD_HELLO, self.seq, self.session_id, self.clock),
-            (self.SERVER_HOST, self.SERVER_PORT),
-        )
-        self.seq += 1
+        self.hello_sent = time.monotonic()
+        self.send_packet(self.CMD_HELLO)
 
         # wait briefly for HELLO
         time.sleep(0.5)
 
         # Step 2: DATA loop
+        get, wait_alive, send = self.send_q.get, self.alive_evt.wait, self.send_packet
         while self.running:
-            if not self.send_q.empty() and not self.awaiting_alive:
-                item = self.send_q.get()
-                if item is None:
-                    print("eof")
-                    break
-
-                self.bump_clock_event()
-                payload = (item + "\n").encode()
-                self.sock.sendto(
-                    self.pack_header(
-                        self.CMD_DATA, self.seq, self.session_id, self.clock, payload
-                    ),
-                    (self.SERVER_HOST, self.SERVER_PORT),
-                )
-                self.seq += 1
-                self.awaiting_alive = True
-                self.last_send_time = time.time()
-
-            # timeout check (Ready Timer → Closing)
-            if self.awaiting_alive and self.last_send_time:
-                if time.time() - self.last_send_time > self.TIMEOUT:
+            if self.awaiting_alive:
+                # Ready Timer: sleep until the receiver sees ALIVE (or the
+                # session closes); no reply in time → Closing
+                if not wait_alive(self.TIMEOUT):
                     print("Timeout waiting for ALIVE, closing.")
                     break
+                continue
 
-            time.sleep(0.01)  # small sleep to avoid busy loop
+            # block on the queue instead of polling it; the timeout only
+            # bounds how long a server-side close goes unnoticed
+            try:
+                item = get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                print("eof")
+                break
+
+            self.alive_evt.clear()
+            self.awaiting_alive = True
+            send(self.CMD_DATA, item)
 
         # Step 3: GOODBYE
-        self.bump_clock_event()
-        self.sock.sendto(
-            self.pack_header(self.CMD_GOODBYE, self.seq, self.session_id, self.clock),
-            (self.SERVER_HOST, self.SERVER_PORT),
-        )
-        self.seq += 1
-        time.sleep(0.5)  # allow server reply
+        self.send_packet(self.CMD_GOODBYE)
+        rx.join(0.5)  # allow server reply; receiver stops as soon as it arrives
         self.running = False
+        rx.join()  # no thread may still be using the socket when it is closed
         self.sock.close()
 
 
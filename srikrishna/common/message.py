@@ -1,27 +1,41 @@
 import struct
 import time
+from dataclasses import dataclass
 
+
+# slots: no per-instance __dict__, so messages are smaller and field access
+# is a C-level slot read. Not frozen: a frozen dataclass's __init__ goes
+# through object.__setattr__ for every field, ~3x slower to construct, and
+# unpack builds one of these per datagram. eq=False keeps the identity
+# __eq__/__hash__ the plain class had, so messages stay hashable.
+@dataclass(slots=True, eq=False)
 class UAPMessage:
     MAGIC = 0xC461
     VERSION = 1
     CMD_HELLO, CMD_DATA, CMD_ALIVE, CMD_GOODBYE = range(4)
 
     HEADER_FORMAT = "!H B B I I I d"
-    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    HEADER_STRUCT = struct.Struct(HEADER_FORMAT)
+    HEADER_SIZE = HEADER_STRUCT.size
+    # the Lamport clock is a 32-bit field on the wire, so it counts modulo
+    # 2**32: every update is masked and wraps from 0xFFFFFFFF back to 0
+    CLOCK_MASK = 0xFFFFFFFF
+
+    command: int
+    seq: int
+    session_id: int
+    clock: int
+    timestamp: float | None = None
+    payload: bytes = b""
 
-    def __init__(self, command, seq, session_id, clock, timestamp=None, payload=b""):
-        self.command = command
-        self.seq = seq
-        self.session_id = session_id
-        self.clock = clock
-        self.timestamp = timestamp or time.time()
-        self.payload = payload
+    def __post_init__(self):
+        if not self.timestamp:
+            self.timestamp = time.time()
 
     def pack(self):
-        header = struct.pack(
-            self.HEADER_FORMAT,
+        header = self.HEADER_STRUCT.pack(
             self.MAGIC, self.VERSION, self.command,
-            self.seq, self.session_id, self.clock, self.timestamp
+            self.seq, self.session_id, self.clock & self.CLOCK_MASK, self.timestamp
         )
         return header + self.payload
 
@@ -29,9 +43,11 @@ class UAPMessage:
     def unpack(cls, packet):
         if len(packet) < cls.HEADER_SIZE:
             return None
-        magic, version, command, seq, sid, clock, ts = struct.unpack(
-            cls.HEADER_FORMAT, packet[:cls.HEADER_SIZE]
+        magic, version, command, seq, sid, clock, ts = cls.HEADER_STRUCT.unpack_from(
+            packet, 0
         )
         if magic != cls.MAGIC or version != cls.VERSION:
             return None
-        return cls(command, seq, sid, clock, ts, packet[cls.HEADER_SIZE:])
+        # payload is a zero-copy view; decode it (str(payload, "utf-8")) where used
+        payload = memoryview(packet)[cls.HEADER_SIZE:]
+        return cls(command, seq, sid, clock, ts, payload)
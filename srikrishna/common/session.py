@@ -6,4 +6,5 @@ class Session:
         self.clock = 0
 
     def update_clock(self, msg):
-        self.clock = max(self.clock, msg.clock) + 1
+        # 32-bit wire field: wrap like the client and server clocks do
+        self.clock = (max(self.clock, msg.clock) + 1) & 0xFFFFFFFF